@@ -11,6 +11,7 @@ logger = logging.getLogger(__name__)
 # Import our components
 from src.ui.components.file_tree import FileTreeView
 from src.core.token_counter import TokenCounter
+from src.core.prompt_exporter import PromptExporter
 
 class RepoPromptApp:
     def __init__(self):
@@ -20,11 +21,14 @@ class RepoPromptApp:
         
         # Initialize components
         self.token_counter = TokenCounter()
+        self.exporter = PromptExporter(self.token_counter)
         self.setup_ui()
         
         # File tracking
         self.current_project = None
         self.checked_items = set()
+        self.symbol_items = {}  # item id -> (file path, symbol name)
+        self.symbol_files = set()  # File items that can be expanded into symbols
         
         # Checkbox symbols
         self.CHECKED = "☑ "
@@ -71,6 +75,11 @@ class RepoPromptApp:
                                            font=("Segoe UI", 12))
         self.total_tokens_label.grid(row=0, column=1, sticky="e")
         
+        # Export button
+        copy_btn = ctk.CTkButton(top_frame, text="Copy Prompt", 
+                              command=self.copy_prompt)
+        copy_btn.grid(row=0, column=2, padx=(10,0))
+        
         # Left panel - Tree view
         tree_frame = ctk.CTkFrame(self.root)
         tree_frame.grid(row=1, column=0, sticky="nsew", padx=10, pady=(0,10))
@@ -120,13 +129,12 @@ class RepoPromptApp:
         if not item_id:
             return
             
-        # Get click region
+        # Get click region; identify_region has no separate value for the
+        # expand indicator, so ask for the element under the pointer
         region = self.tree.identify_region(event.x, event.y)
+        element = self.tree.identify_element(event.x, event.y)
         
-        if region == "tree":
-            # Only toggle checkbox
-            self.toggle_check(item_id)
-        elif region == "button":
+        if "indicator" in element:
             # Just toggle expansion without affecting checkbox
             current_state = self.tree.item(item_id, "open")
             item_text = self.tree.item(item_id)['text']
@@ -144,6 +152,12 @@ class RepoPromptApp:
             for child in self.tree.get_children(item_id):
                 self.preserve_checkbox_state(child)
                 
+            # Stop the default Treeview binding from toggling it back
+            return "break"
+        elif region == "tree":
+            # Only toggle checkbox
+            self.toggle_check(item_id)
+                
     def preserve_checkbox_state(self, item_id):
         """Preserve the checkbox state of an item and its children."""
         current_text = self.tree.item(item_id)['text']
@@ -202,6 +216,10 @@ class RepoPromptApp:
         tree_items = []
         
         def collect_items(node, level=0, is_last_sibling=False, parent_prefix=""):
+            # Symbols are only listed in the tree view, not the file tree text
+            if node in self.symbol_items:
+                return
+                
             # Check if item is in checked_items set
             if node in self.checked_items:
                 item_text = self.tree.item(node)['text']
@@ -234,7 +252,8 @@ class RepoPromptApp:
             current_level = 0
             for level, text, prefix in tree_items[1:]:  # Skip the root item
                 # Check if item is a directory
-                is_dir = bool(self.tree.get_children(self.get_item_by_text(text)))
+                item = self.get_item_by_text(text)
+                is_dir = bool(self.tree.get_children(item)) and item not in self.symbol_files
                 
                 # Format text based on whether it's a directory or file
                 if is_dir:
@@ -315,7 +334,8 @@ class RepoPromptApp:
             
     def expand_all_nodes(self):
         def expand_node(node):
-            self.tree.item(node, open=True)
+            # Files stay collapsed; expand them by hand to pick symbols
+            self.tree.item(node, open=node not in self.symbol_files)
             for child in self.tree.get_children(node):
                 expand_node(child)
                 
@@ -325,6 +345,8 @@ class RepoPromptApp:
     def load_project_tree(self, path):
         debug_print(f"Loading project tree from: {path}")
         self.checked_items.clear()
+        self.symbol_items.clear()
+        self.symbol_files.clear()
         for item in self.tree.get_children():
             self.tree.delete(item)
             
@@ -375,11 +397,69 @@ class RepoPromptApp:
                                                      text=f"{self.CHECKED}{item}",
                                                      values=[item_path])
                     self.checked_items.add(child)
+                    self.add_symbol_nodes(child, item_path)
                     
         except PermissionError as e:
             debug_print(f"Permission error accessing {path}: {str(e)}")
             pass
             
+    def add_symbol_nodes(self, parent, path):
+        """Add a file's methods, functions or Blade sections as child items."""
+        symbols = self.token_counter.get_file_symbols(path)
+        if not symbols:
+            return
+            
+        debug_print(f"Adding {len(symbols)} symbols for: {path}")
+        self.symbol_files.add(parent)
+        for symbol in symbols:
+            node = self.tree.insert_symbol(parent, "end",
+                                        text=f"{self.CHECKED}{symbol.label}",
+                                        symbol=symbol, values=[path])
+            self.symbol_items[node] = (path, symbol.qualified_name)
+            self.checked_items.add(node)
+            
+    def get_selection(self):
+        """Get the checked file paths and, per file, the checked symbols.
+
+        A file with some symbols unchecked is exported as a skeleton with
+        only its checked symbols; otherwise the whole file is exported.
+        """
+        paths = set()
+        symbols = {}
+        for item in self.checked_items:
+            if item in self.symbol_items:
+                continue
+            path = self.tree.item(item)['values'][0]
+            if os.path.isfile(path):
+                paths.add(path)
+                
+        for item in self.symbol_files:
+            path = self.tree.item(item)['values'][0]
+            children = self.tree.get_children(item)
+            checked = {self.symbol_items[child][1] for child in children if child in self.checked_items}
+            if not checked and item not in self.checked_items:
+                continue
+            paths.add(path)
+            if len(checked) < len(children):
+                symbols[path] = checked
+                
+        return paths, symbols
+        
+    def copy_prompt(self):
+        """Export the checked files and symbols to the clipboard."""
+        if not self.current_project:
+            messagebox.showinfo("Repo Prompt", "Select a project first.")
+            return
+            
+        paths, symbols = self.get_selection()
+        prompt, tokens = self.exporter.export(self.current_project, paths, symbols)
+        self.root.clipboard_clear()
+        self.root.clipboard_append(prompt)
+        debug_print(f"Copied prompt with {len(paths)} files ({tokens} tokens)")
+        
+        token_str = f"{tokens/1000:.1f}k" if tokens >= 1000 else str(tokens)
+        messagebox.showinfo("Repo Prompt", f"Copied {len(paths)} files ({token_str} tokens) to the clipboard.")
+            
 def debug_print(msg):
     logger.debug(msg)
     
@@ -0,0 +1,261 @@
+import hashlib
+import os
+import sys
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import logging
+
+from src.core.token_counter import TokenCounter
+from src.core.symbol_parser import parse_symbols, render_skeleton
+
+logger = logging.getLogger(__name__)
+
+class FragmentCache:
+    """LRU cache of rendered <file> fragments and their token counts.
+
+    Fragments are keyed by the file's content hash plus the export options
+    that shape the fragment. Files are only re-read and re-hashed when their
+    mtime or size changes, and the fragments of the old content are dropped
+    then. Memory use, including the per-file state, is capped at max_bytes;
+    least recently used fragments are evicted first, then file state.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._fragments: "OrderedDict[tuple, Tuple[str, int]]" = OrderedDict()
+        # path -> (mtime_ns, size, hash, is_binary)
+        self._files: "OrderedDict[str, Tuple[int, int, str, bool]]" = OrderedDict()
+
+    def _file_entry_size(self, file_path: str, entry: Tuple[int, int, str, bool]) -> int:
+        return sys.getsizeof(file_path) + sys.getsizeof(entry) + sys.getsizeof(entry[2])
+
+    def forget_file(self, file_path: str):
+        """Drop a file's state and the fragments rendered from it."""
+        entry = self._files.pop(file_path, None)
+        if entry is not None:
+            self.size -= self._file_entry_size(file_path, entry)
+            self.invalidate(entry[2])
+
+    def file_state(self, file_path: str) -> Tuple[str, bool, Optional[bytes]]:
+        """Get the content hash of a file and whether it looks binary.
+
+        The file's bytes are returned too when they had to be read, so the
+        caller can render exactly the content that was hashed.
+        """
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            self.forget_file(file_path)
+            raise
+        known = self._files.get(file_path)
+        if known and known[0] == stat.st_mtime_ns and known[1] == stat.st_size:
+            self._files.move_to_end(file_path)
+            return known[2], known[3], None
+        return self.read_file(file_path)
+
+    def read_file(self, file_path: str) -> Tuple[str, bool, bytes]:
+        """Read and hash a file, recording its state for later mtime checks."""
+        # Stat before reading: if the file changes mid-read, the next
+        # file_state sees a newer mtime and reads it again
+        try:
+            stat = os.stat(file_path)
+            with open(file_path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            self.forget_file(file_path)
+            raise
+        known = self._files.get(file_path)
+        digest = hashlib.sha1(data).hexdigest()
+        is_binary = b'\0' in data[:1024]  # Same check as TokenCounter.is_binary_file
+        if known and known[2] != digest:
+            self.forget_file(file_path)
+        elif known:
+            self.size -= self._file_entry_size(file_path, known)
+        entry = (stat.st_mtime_ns, stat.st_size, digest, is_binary)
+        self._files[file_path] = entry
+        self._files.move_to_end(file_path)
+        self.size += self._file_entry_size(file_path, entry)
+        self._evict()
+        return digest, is_binary, data
+
+    def invalidate(self, digest: str):
+        """Drop every fragment rendered from content with this hash."""
+        for key in [key for key in self._fragments if key[0] == digest]:
+            self.size -= sys.getsizeof(self._fragments.pop(key)[0])
+
+    def get(self, key: tuple) -> Optional[Tuple[str, int]]:
+        entry = self._fragments.get(key)
+        if entry is not None:
+            self._fragments.move_to_end(key)
+        return entry
+
+    def put(self, key: tuple, fragment: str, tokens: int):
+        if key in self._fragments:
+            self.size -= sys.getsizeof(self._fragments.pop(key)[0])
+        self._fragments[key] = (fragment, tokens)
+        self.size += sys.getsizeof(fragment)
+        self._evict()
+
+    def _evict(self):
+        """Evict least recently used fragments, then file state, down to max_bytes."""
+        while self.size > self.max_bytes and len(self._fragments) > 1:
+            _, (evicted, _) = self._fragments.popitem(last=False)
+            self.size -= sys.getsizeof(evicted)
+        while self.size > self.max_bytes and len(self._files) > 1:
+            file_path, entry = self._files.popitem(last=False)
+            self.size -= self._file_entry_size(file_path, entry)
+
+    def clear(self):
+        self._fragments.clear()
+        self._files.clear()
+        self.size = 0
+
+class PromptExporter:
+    """Build the XML prompt (file tree plus file contents) for a selection."""
+
+    def __init__(self, token_counter: TokenCounter, fragment_cache: Optional[FragmentCache] = None):
+        self.token_counter = token_counter
+        self.fragment_cache = fragment_cache or FragmentCache()
+        # Only a handful of boundary pairs occur; the cap guards odd inputs
+        self._boundaries: Dict[Tuple[str, str], int] = {}
+        self.max_boundaries = 256
+
+    def escape_cdata(self, content: str) -> str:
+        """Split any ']]>' so the content can't close the CDATA section early."""
+        return content.replace(']]>', ']]]]><![CDATA[>')
+
+    def decode(self, data: bytes) -> str:
+        """Decode file bytes like text mode does: UTF-8 with universal newlines."""
+        text = data.decode('utf-8', errors='replace')
+        return text.replace('\r\n', '\n').replace('\r', '\n')
+
+    def relative_path(self, root_path: str, file_path: str) -> str:
+        """Get the project-relative path with forward slashes."""
+        return os.path.relpath(file_path, root_path).replace('\\', '/')
+
+    def render_tree(self, root_path: str, file_paths: Iterable[str]) -> str:
+        """Render the selected files as a tree rooted at the project folder."""
+        tree: Dict[str, dict] = {}
+        for file_path in file_paths:
+            node = tree
+            for part in self.relative_path(root_path, file_path).split('/'):
+                node = node.setdefault(part, {})
+
+        lines = [f"{os.path.basename(os.path.normpath(root_path))}/"]
+
+        def add_lines(node: Dict[str, dict], prefix: str):
+            names = sorted(node)
+            for i, name in enumerate(names):
+                is_last = i == len(names) - 1
+                children = node[name]
+                lines.append(f"{prefix}{'└── ' if is_last else '├── '}{name}{'/' if children else ''}")
+                add_lines(children, prefix + ("    " if is_last else "│   "))
+
+        add_lines(tree, "")
+        return "\n".join(lines) + "\n"
+
+    def render_file(self, root_path: str, file_path: str, content: str,
+                    selected_symbols: Optional[Set[str]] = None) -> str:
+        """Render one file's content as a <file> fragment.
+
+        With selected_symbols, only those symbols are kept in full and the
+        rest of the file is reduced to its skeleton.
+        """
+        if selected_symbols is not None:
+            # Parse the content being rendered, not a possibly newer file
+            symbols = parse_symbols(file_path, content)
+            content = render_skeleton(content, symbols, selected_symbols)
+        if content and not content.endswith('\n'):
+            content += '\n'
+        return (
+            "<file>\n"
+            f"<file_path>{self.relative_path(root_path, file_path)}</file_path>\n"
+            f"<file_code><![CDATA[\n{self.escape_cdata(content)}]]></file_code>\n"
+            "</file>\n"
+        )
+
+    def selected_tokens(self, root_path: str, file_path: str,
+                        selected_symbols: Optional[Set[str]] = None) -> int:
+        """Get the tokens a file adds to the export, 0 for binary or unreadable files."""
+        try:
+            fragment = self.cached_fragment(root_path, file_path, selected_symbols)
+        except OSError:
+            return 0
+        return fragment[1] if fragment else 0
+
+    def export(self, root_path: str, file_paths: Iterable[str],
+               symbols: Optional[Dict[str, Set[str]]] = None) -> Tuple[str, int]:
+        """Build the prompt for the selected files and count its tokens.
+
+        symbols maps a file path to the symbol names to keep; files not in
+        it are exported whole.
+        """
+        symbols = symbols or {}
+        included: List[str] = []
+        fragments: List[Tuple[str, int]] = []
+        for file_path in sorted(file_paths):
+            try:
+                fragment = self.cached_fragment(root_path, file_path, symbols.get(file_path))
+            except OSError as e:
+                logger.debug(f"Error reading {file_path}: {str(e)}")
+                continue
+            if fragment is not None:
+                included.append(file_path)
+                fragments.append(fragment)
+        logger.debug(f"Exporting {len(included)} files from {root_path}")
+
+        tree = f"<file_tree>\n{self.render_tree(root_path, included)}</file_tree>\n<files>\n"
+        parts = [(tree, self.token_counter.count_text_tokens(tree))]
+        parts.extend(fragments)
+        parts.append(("</files>\n", self.token_counter.count_text_tokens("</files>\n")))
+
+        tokens = sum(part_tokens for _, part_tokens in parts)
+        for (before, _), (after, _) in zip(parts, parts[1:]):
+            tokens += self.boundary_adjustment(before, after)
+        return "".join(text for text, _ in parts), tokens
+
+    def cached_fragment(self, root_path: str, file_path: str,
+                        selected_symbols: Optional[Set[str]] = None) -> Optional[Tuple[str, int]]:
+        """Get a file's rendered fragment and token count, or None for binary files."""
+        if not os.path.isfile(file_path):
+            self.fragment_cache.forget_file(file_path)
+            return None
+        digest, is_binary, data = self.fragment_cache.file_state(file_path)
+        if is_binary:
+            return None
+        options = (
+            self.relative_path(root_path, file_path),
+            None if selected_symbols is None else frozenset(selected_symbols),
+        )
+        fragment = self.fragment_cache.get((digest,) + options)
+        if fragment is not None:
+            return fragment
+
+        # Render from the same bytes the key's hash was computed from
+        if data is None:
+            digest, is_binary, data = self.fragment_cache.read_file(file_path)
+        if is_binary:
+            return None
+        text = self.render_file(root_path, file_path, self.decode(data), selected_symbols)
+        fragment = (text, self.token_counter.count_text_tokens(text))
+        self.fragment_cache.put((digest,) + options, *fragment)
+        return fragment
+
+    def boundary_adjustment(self, before: str, after: str) -> int:
+        """Token difference between counting two parts joined and apart.
+
+        Every part starts at a line start with '<', where the tokenizer's
+        pre-split always breaks, so only the last line of one part and the
+        first line of the next can merge. The difference is computed on
+        those two lines and memoized, since the same few pairs recur.
+        """
+        tail = before[before.rfind('\n', 0, len(before) - 1) + 1:]
+        head = after[:after.find('\n') + 1] or after
+        key = (tail, head)
+        if key not in self._boundaries:
+            if len(self._boundaries) >= self.max_boundaries:
+                self._boundaries.clear()
+            count = self.token_counter.count_text_tokens
+            self._boundaries[key] = count(tail + head) - count(tail) - count(head)
+        return self._boundaries[key]
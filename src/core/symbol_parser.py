@@ -0,0 +1,275 @@
+import re
+from typing import List, Optional, Set, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Symbol:
+    """A selectable span of a source file (1-based, inclusive line numbers)."""
+
+    def __init__(self, kind: str, name: str, start: int, end: int,
+                 signature_end: int, parent: Optional[str] = None, has_body: bool = True):
+        self.kind = kind  # 'function', 'method' or 'section'
+        self.name = name
+        self.start = start
+        self.end = end
+        self.signature_end = signature_end  # Last line kept when the body is omitted
+        self.parent = parent  # Enclosing class for methods
+        self.has_body = has_body  # False for abstract and interface methods
+        self.tokens = 0
+
+    @property
+    def collapsible(self) -> bool:
+        """Whether the skeleton can shorten this symbol when it isn't selected."""
+        return self.has_body and self.start != self.end
+
+    @property
+    def qualified_name(self) -> str:
+        return f"{self.parent}::{self.name}" if self.parent else self.name
+
+    @property
+    def label(self) -> str:
+        if self.kind == 'section':
+            return f"@section('{self.name}')"
+        return f"{self.qualified_name}()"
+
+    def __repr__(self):
+        return f"Symbol({self.kind}, {self.qualified_name}, {self.start}-{self.end})"
+
+def is_blade_file(file_path: str) -> bool:
+    return file_path.lower().endswith('.blade.php')
+
+def is_symbol_file(file_path: str) -> bool:
+    """Check if the file type can be split into symbols."""
+    return file_path.lower().endswith('.php')
+
+HEREDOC_RE = re.compile(r"<<<[ \t]*(['\"]?)(\w+)\1\r?\n")
+
+def mask_php(content: str) -> str:
+    """Blank out strings, comments and inline HTML, keeping offsets and newlines.
+
+    What's left is PHP code only, so braces and keywords can be matched
+    without tripping over '{' inside a string or 'function' in a comment.
+    """
+    out = list(content)
+    n = len(content)
+    i = 0
+
+    def blank(start: int, stop: int):
+        for j in range(start, min(stop, n)):
+            if out[j] != '\n':
+                out[j] = ' '
+
+    # Everything before the first <?php is inline HTML
+    in_php = False
+    while i < n:
+        if not in_php:
+            open_at = content.find('<?', i)
+            if open_at == -1:
+                blank(i, n)
+                break
+            blank(i, open_at)
+            i = open_at + (5 if content.startswith('<?php', open_at) else 3 if content.startswith('<?=', open_at) else 2)
+            in_php = True
+            continue
+
+        c = content[i]
+        if c == '?' and content.startswith('?>', i):
+            i += 2
+            in_php = False
+        elif c == '#' and not content.startswith('#[', i) or c == '/' and content.startswith('//', i):
+            stop = i
+            while stop < n and content[stop] != '\n' and not content.startswith('?>', stop):
+                stop += 1
+            blank(i, stop)
+            i = stop
+        elif c == '/' and content.startswith('/*', i):
+            stop = content.find('*/', i + 2)
+            stop = n if stop == -1 else stop + 2
+            blank(i, stop)
+            i = stop
+        elif c in ('"', "'", '`'):
+            stop = i + 1
+            while stop < n and content[stop] != c:
+                stop += 2 if content[stop] == '\\' else 1
+            blank(i + 1, stop)
+            i = stop + 1
+        elif c == '<' and content.startswith('<<<', i):
+            match = HEREDOC_RE.match(content, i)
+            if not match:
+                i += 3
+                continue
+            end_re = re.compile(r"^[ \t]*" + re.escape(match.group(2)) + r"\b", re.MULTILINE)
+            end = end_re.search(content, match.end())
+            stop = n if end is None else end.start()
+            blank(match.end(), stop)
+            i = n if end is None else end.end()
+        else:
+            i += 1
+
+    return ''.join(out)
+
+CLASS_RE = re.compile(r"(?<![$\w])(class|interface|trait|enum)\b\s*(\w*)")
+FUNCTION_RE = re.compile(r"(?<![$\w])function\s+&?\s*(\w+)\s*\(")
+BLOCK_PREFIX_RE = re.compile(r"^\s*(/\*\*|\*|\*/|#\[|//)")
+
+def _match_brace(masked: str, open_at: int) -> Optional[int]:
+    """Find the '}' closing the '{' at open_at."""
+    depth = 0
+    for i in range(open_at, len(masked)):
+        if masked[i] == '{':
+            depth += 1
+        elif masked[i] == '}':
+            depth -= 1
+            if depth == 0:
+                return i
+    return None
+
+def _find_block(masked: str, start: int) -> Optional[Tuple[int, int]]:
+    """Find the body of a declaration starting at offset start.
+
+    Returns (open_brace, close_brace) offsets, or (semicolon, semicolon)
+    for bodiless declarations such as abstract and interface methods.
+    """
+    depth = 0
+    for i in range(start, len(masked)):
+        c = masked[i]
+        if c in '([':
+            depth += 1
+        elif c in ')]':
+            depth -= 1
+        elif depth == 0 and c == ';':
+            return i, i
+        elif depth == 0 and c == '{':
+            close_at = _match_brace(masked, i)
+            return None if close_at is None else (i, close_at)
+    return None
+
+def _extend_to_docblock(lines: List[str], start: int, floor: int) -> int:
+    """Move a 1-based start line up over a directly preceding docblock/attributes."""
+    while start - 1 > floor and BLOCK_PREFIX_RE.match(lines[start - 2]):
+        start -= 1
+    return start
+
+def parse_php_symbols(content: str) -> List[Symbol]:
+    """Find named functions and class methods in PHP source."""
+    masked = mask_php(content)
+    lines = content.split('\n')
+
+    def line_of(offset: int) -> int:
+        return masked.count('\n', 0, offset) + 1
+
+    classes = []  # (name, open_offset, close_offset)
+    for match in CLASS_RE.finditer(masked):
+        before = masked[:match.start()].rstrip()
+        # Skip '::class' and '->class'
+        if before.endswith(('::', '->')):
+            continue
+        # Anonymous classes ('new class {') get no name and their methods are skipped
+        is_anonymous = before.endswith('new')
+        if not is_anonymous and not match.group(2):
+            continue
+        block = _find_block(masked, match.start() if is_anonymous else match.end())
+        if block and block[0] != block[1]:
+            classes.append((None if is_anonymous else match.group(2), block[0], block[1]))
+
+    symbols = []
+    taken_until = -1
+    for match in FUNCTION_RE.finditer(masked):
+        if match.start() < taken_until:
+            continue  # Named function nested in another function's body
+        block = _find_block(masked, match.end() - 1)  # From the '('
+        if block is None:
+            continue
+        open_at, close_at = block
+
+        enclosing = [c for c in classes if c[1] < match.start() < c[2]]
+        parent = enclosing[-1][0] if enclosing else None
+        floor = line_of(enclosing[-1][1]) if enclosing else 0
+        if enclosing and parent is None:
+            continue
+
+        # Start at the line holding the modifiers ('public static function')
+        start = _extend_to_docblock(lines, line_of(match.start()), floor)
+        symbols.append(Symbol(
+            'method' if parent else 'function', match.group(1),
+            start, line_of(close_at), line_of(open_at), parent,
+            has_body=open_at != close_at,
+        ))
+        taken_until = close_at
+
+    return symbols
+
+# Directives only count at the start of a line, so '@stop' inside a
+# string or script doesn't close a section
+SECTION_RE = re.compile(r"^\s*@section\s*\(\s*(['\"])(.+?)\1\s*(,)?")
+SECTION_END_RE = re.compile(r"^\s*@(endsection|stop|show|overwrite|append)\b")
+
+def parse_blade_symbols(content: str) -> List[Symbol]:
+    """Find @section blocks in a Blade template."""
+    lines = content.split('\n')
+    symbols = []
+    open_sections = []  # (name, start_line)
+
+    for number, line in enumerate(lines, 1):
+        match = SECTION_RE.match(line)
+        if match and match.group(3):
+            # Inline form: @section('title', 'Value')
+            symbols.append(Symbol('section', match.group(2), number, number, number))
+        elif match:
+            open_sections.append((match.group(2), number))
+        elif SECTION_END_RE.match(line) and open_sections:
+            name, start = open_sections.pop()
+            symbols.append(Symbol('section', name, start, number, start))
+
+    symbols.sort(key=lambda symbol: symbol.start)
+    return symbols
+
+def parse_symbols(file_path: str, content: str) -> List[Symbol]:
+    """Split a PHP or Blade file into symbols."""
+    try:
+        if is_blade_file(file_path):
+            return parse_blade_symbols(content)
+        return parse_php_symbols(content)
+    except Exception as e:
+        logger.debug(f"Error parsing symbols in {file_path}: {str(e)}")
+        return []
+
+def symbol_text(lines: List[str], symbol: Symbol) -> str:
+    return '\n'.join(lines[symbol.start - 1:symbol.end])
+
+def render_skeleton(content: str, symbols: List[Symbol], selected: Set[str]) -> str:
+    """Keep the selected symbols and everything outside symbols.
+
+    Unselected methods and functions keep their signature with the body
+    replaced by a '// ...' marker; unselected Blade sections keep their
+    opening and closing directive. Bodiless declarations and one-line
+    symbols are always kept as they are.
+    """
+    lines = content.split('\n')
+    out = []
+    line = 1
+    for symbol in symbols:
+        if symbol.start < line:
+            continue
+        out.extend(lines[line - 1:symbol.start - 1])
+        if symbol.qualified_name in selected or not symbol.collapsible:
+            out.extend(lines[symbol.start - 1:symbol.end])
+        elif symbol.kind == 'section':
+            indent = re.match(r"\s*", lines[symbol.start - 1]).group()
+            out.append(lines[symbol.start - 1])
+            out.append(f"{indent}    {{{{-- ... --}}}}")
+            out.append(lines[symbol.end - 1])
+        else:
+            signature = lines[symbol.start - 1:symbol.signature_end]
+            indent = re.match(r"\s*", signature[-1]).group()
+            # Drop anything after the opening brace on the signature line
+            last = signature[-1]
+            brace = last.rfind('{')
+            signature[-1] = last[:brace + 1] if brace != -1 else last
+            out.extend(signature)
+            out.append(f"{indent}    // ...")
+            out.append(f"{indent}}}")
+        line = symbol.end + 1
+    out.extend(lines[line - 1:])
+    return '\n'.join(out)
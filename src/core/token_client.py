@@ -0,0 +1,63 @@
+import itertools
+import json
+import os
+import socket
+from typing import Any, Optional
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_TOKEN_FILE = os.path.join(os.path.expanduser('~'), '.repo-prompt-token')
+
+class TokenServerError(Exception):
+    def __init__(self, code: int, message: str):
+        super().__init__(f"{message} (code {code})")
+        self.code = code
+        self.message = message
+
+class TokenClient:
+    """Thin blocking client for the token server.
+
+    Deliberately imports nothing heavy so the GUI and editor plugins can
+    talk to a running server without loading tiktoken themselves.
+    """
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                 socket_path: Optional[str] = None, timeout: Optional[float] = 60.0,
+                 token_file: str = DEFAULT_TOKEN_FILE):
+        if socket_path:
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._sock.settimeout(timeout)
+            self._sock.connect(socket_path)
+        else:
+            self._sock = socket.create_connection((host, port), timeout=timeout)
+        self._file = self._sock.makefile('rb')
+        self._ids = itertools.count(1)
+
+        # TCP connections must prove they can read the owner-only token file
+        if not socket_path:
+            with open(token_file, 'r') as f:
+                self.call('auth', token=f.read().strip())
+
+    def call(self, method: str, **params: Any) -> Any:
+        """Send a request and wait for its result."""
+        request_id = next(self._ids)
+        request = {'jsonrpc': '2.0', 'id': request_id, 'method': method, 'params': params}
+        self._sock.sendall(json.dumps(request).encode('utf-8') + b'\n')
+
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("token server closed the connection")
+        response = json.loads(line)
+        if 'error' in response:
+            raise TokenServerError(response['error']['code'], response['error']['message'])
+        return response['result']
+
+    def close(self):
+        self._file.close()
+        self._sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -1,14 +1,20 @@
 import os
+import threading
 import tiktoken
-from typing import Dict, Tuple
+from typing import Dict, List, Tuple
 import logging
 
+from src.core.symbol_parser import Symbol, is_symbol_file, parse_symbols, symbol_text
+
 logger = logging.getLogger(__name__)
 
 class TokenCounter:
     def __init__(self):
         self.encoder = tiktoken.get_encoding("cl100k_base")  # GPT-4 encoding
         self.cache: Dict[str, int] = {}
+        self.mtimes: Dict[str, float] = {}
+        self.symbol_cache: Dict[str, Tuple[float, List[Symbol]]] = {}
+        self._lock = threading.Lock()  # Guards the caches when shared between threads
         self.total_tokens = 0
         
         # File extensions to skip
@@ -49,31 +55,76 @@ class TokenCounter:
         except Exception:
             return True
             
+    def count_text_tokens(self, text: str) -> int:
+        """Count tokens in a string."""
+        return len(self.encoder.encode(text, disallowed_special=()))
+        
+    def get_mtime(self, file_path: str) -> float:
+        """Get file modification time, or -1 if the file is gone."""
+        try:
+            return os.path.getmtime(file_path)
+        except OSError:
+            return -1
+            
     def count_file_tokens(self, file_path: str) -> int:
         """Count tokens in a file."""
-        if file_path in self.cache:
-            return self.cache[file_path]
+        # Cached counts are only valid while the file is unchanged
+        mtime = self.get_mtime(file_path)
+        with self._lock:
+            if self.mtimes.get(file_path) == mtime and file_path in self.cache:
+                return self.cache[file_path]
             
+        token_count = 0
         if self.should_skip_file(file_path) or self.is_binary_file(file_path):
             logger.debug(f"Skipping binary/excluded file: {file_path}")
-            self.cache[file_path] = 0
-            return 0
+        else:
+            try:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    token_count = self.count_text_tokens(f.read())
+            except Exception as e:
+                logger.debug(f"Error counting tokens in {file_path}: {str(e)}")
+                
+        with self._lock:
+            self.cache[file_path] = token_count
+            self.mtimes[file_path] = mtime
+        return token_count
+        
+    def cached_counts(self) -> Dict[str, int]:
+        """Get a snapshot of the cached per-file token counts."""
+        with self._lock:
+            return dict(self.cache)
             
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                token_count = len(self.encoder.encode(content))
-                self.cache[file_path] = token_count
-                return token_count
-        except Exception as e:
-            logger.debug(f"Error counting tokens in {file_path}: {str(e)}")
-            self.cache[file_path] = 0
-            return 0
+    def get_file_symbols(self, file_path: str) -> List[Symbol]:
+        """Get the PHP/Blade symbols of a file with per-symbol token counts."""
+        mtime = self.get_mtime(file_path)
+        with self._lock:
+            cached = self.symbol_cache.get(file_path)
+        if cached and cached[0] == mtime:
+            return cached[1]
             
+        symbols: List[Symbol] = []
+        if is_symbol_file(file_path) and not self.should_skip_file(file_path) and not self.is_binary_file(file_path):
+            try:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    content = f.read()
+                symbols = parse_symbols(file_path, content)
+                lines = content.split('\n')
+                for symbol in symbols:
+                    symbol.tokens = self.count_text_tokens(symbol_text(lines, symbol))
+            except Exception as e:
+                logger.debug(f"Error reading symbols in {file_path}: {str(e)}")
+                symbols = []
+                
+        with self._lock:
+            self.symbol_cache[file_path] = (mtime, symbols)
+        return symbols
+        
     def get_file_stats(self, file_path: str) -> Tuple[str, float]:
         """Get file token count and percentage of total."""
-        tokens = self.count_file_tokens(file_path)
+        return self.format_stats(self.count_file_tokens(file_path))
         
+    def format_stats(self, tokens: int) -> Tuple[str, float]:
+        """Format a token count and its percentage of total."""
         # Format token count
         if tokens >= 1000:
             token_str = f"-{tokens/1000:.1f}k"
@@ -112,7 +163,14 @@ class TokenCounter:
     def update_total_tokens(self, root_path: str):
         """Update the total token count for the project."""
         self.total_tokens = 0
-        self.cache.clear()  # Clear cache when updating totals
+        
+        # Cached counts are checked against mtime, so keep them and only
+        # drop files that no longer exist
+        for file_path in [path for path in self.cached_counts() if not os.path.exists(path)]:
+            with self._lock:
+                self.cache.pop(file_path, None)
+                self.mtimes.pop(file_path, None)
+                self.symbol_cache.pop(file_path, None)
         
         # First pass: count all tokens
         for root, _, files in os.walk(root_path):
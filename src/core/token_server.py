@@ -0,0 +1,381 @@
+import argparse
+import asyncio
+import hmac
+import json
+import os
+import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Set
+import logging
+
+from src.core.token_counter import TokenCounter
+from src.core.prompt_exporter import PromptExporter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_TOKEN_FILE = os.path.join(os.path.expanduser('~'), '.repo-prompt-token')
+
+# JSON-RPC 2.0 error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+SERVER_ERROR = -32000
+UNAUTHORIZED = -32001
+
+def is_within(root: str, path: str) -> bool:
+    """Check if path is root or inside it; paths on another drive never are."""
+    try:
+        return os.path.commonpath([root, path]) == root
+    except ValueError:
+        return False
+
+class RpcError(Exception):
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+class Session:
+    """Per-connection state: the scanned project and the selection."""
+
+    def __init__(self):
+        self.project_root: Optional[str] = None
+        self.selected: Set[str] = set()
+        self.selected_symbols: Dict[str, Set[str]] = {}
+        self.authenticated = False
+
+class TokenServer:
+    """Resident token-count service speaking newline-delimited JSON-RPC 2.0.
+
+    The encoder and the count, symbol and fragment caches stay in memory
+    and are shared by all clients; each connection has its own project
+    and selection. Scanned roots are remembered, so a new connection can
+    pass 'root' to any method instead of scanning again. Work runs on a
+    thread pool so one client's scan doesn't hold up another client's
+    count. TokenCounter guards its own caches; scans are serialized by one
+    lock and the exporter's fragment cache is guarded by another.
+
+    Over TCP any local process can connect, so every connection must first
+    call 'auth' with the token the server writes to an owner-only token
+    file. The Unix socket is owner-only itself and needs no token.
+    """
+
+    def __init__(self):
+        self.token_counter = TokenCounter()
+        self.exporter = PromptExporter(self.token_counter)
+        self._scan_lock = threading.Lock()
+        self._fragment_lock = threading.Lock()
+        self._scanned_roots: Set[str] = set()
+        self._executor = ThreadPoolExecutor()
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._token: Optional[str] = None
+        self._token_file: Optional[str] = None
+        self._methods: Dict[str, Callable[[Session, Dict[str, Any]], Any]] = {
+            'ping': lambda session, params: 'pong',
+            'auth': self._auth,
+            'count': self._count,
+            'scan': self._scan,
+            'symbols': self._symbols,
+            'select': self._select,
+            'export': self._export,
+        }
+
+    def _resolve(self, session: Session, path: str) -> str:
+        """Resolve a path against the scanned project root.
+
+        Paths that end up outside the project (absolute paths, '..' or
+        symlinks pointing elsewhere) are rejected, so clients can only read
+        files of the project they scanned.
+        """
+        root = self._require_project(session)
+        if not isinstance(path, str):
+            raise RpcError(INVALID_PARAMS, "paths must be strings")
+        resolved = os.path.realpath(os.path.join(root, path))
+        if not is_within(root, resolved):
+            raise RpcError(INVALID_PARAMS, f"path is outside the project: {path}")
+        return resolved
+
+    def _auth(self, session: Session, params: Dict[str, Any]) -> bool:
+        """Authenticate the connection with the token from the token file."""
+        token = params.get('token')
+        if self._token is not None and not (
+            isinstance(token, str) and hmac.compare_digest(token, self._token)
+        ):
+            raise RpcError(UNAUTHORIZED, "invalid token")
+        session.authenticated = True
+        return True
+
+    def _use_root(self, session: Session, root: Any):
+        """Switch the session to a root that some client already scanned."""
+        if not isinstance(root, str):
+            raise RpcError(INVALID_PARAMS, "'root' must be a string")
+        root = os.path.realpath(root)
+        if root not in self._scanned_roots:
+            raise RpcError(INVALID_PARAMS, f"project not scanned; call 'scan' first: {root}")
+        if root != session.project_root:
+            session.project_root = root
+            session.selected.clear()
+            session.selected_symbols.clear()
+
+    def _require_project(self, session: Session) -> str:
+        if not session.project_root:
+            raise RpcError(INVALID_PARAMS, "no project scanned; call 'scan' first")
+        return session.project_root
+
+    def _count(self, session: Session, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Count tokens for {'text': ...} or {'path': ...}."""
+        if 'text' in params:
+            return {'tokens': self.token_counter.count_text_tokens(str(params['text']))}
+        if 'path' in params:
+            path = self._resolve(session, params['path'])
+            if not os.path.isfile(path):
+                raise RpcError(INVALID_PARAMS, f"not a file: {path}")
+            return {'tokens': self.token_counter.count_file_tokens(path)}
+        raise RpcError(INVALID_PARAMS, "count needs 'text' or 'path'")
+
+    def _scan(self, session: Session, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Load a project: count every file and reset the selection."""
+        root = params.get('root')
+        if not isinstance(root, str) or not os.path.isdir(root):
+            raise RpcError(INVALID_PARAMS, f"not a directory: {root}")
+        root = os.path.realpath(root)
+        session.project_root = root
+        session.selected.clear()
+        session.selected_symbols.clear()
+
+        # One scan at a time: total_tokens is shared
+        with self._scan_lock:
+            self.token_counter.update_total_tokens(root)
+            files = {
+                self.exporter.relative_path(root, path): tokens
+                for path, tokens in self.token_counter.cached_counts().items()
+                if tokens and is_within(root, path)
+            }
+            total_tokens = self.token_counter.total_tokens
+            self._scanned_roots.add(root)
+        return {'root': root, 'total_tokens': total_tokens, 'files': files}
+
+    def _symbols(self, session: Session, params: Dict[str, Any]) -> Dict[str, Any]:
+        """List the PHP/Blade symbols of {'path': ...} with token counts."""
+        path = self._resolve(session, params.get('path'))
+        if not os.path.isfile(path):
+            raise RpcError(INVALID_PARAMS, f"not a file: {path}")
+        symbols = [
+            {'name': symbol.qualified_name, 'label': symbol.label, 'kind': symbol.kind,
+             'start': symbol.start, 'end': symbol.end, 'tokens': symbol.tokens}
+            for symbol in self.token_counter.get_file_symbols(path)
+        ]
+        return {'symbols': symbols}
+
+    def _parse_symbols(self, session: Session, symbols: Any) -> Dict[str, Optional[Set[str]]]:
+        if not isinstance(symbols, dict):
+            raise RpcError(INVALID_PARAMS, "'symbols' must map paths to lists of names")
+        parsed: Dict[str, Optional[Set[str]]] = {}
+        for path, names in symbols.items():
+            if names is not None and (
+                not isinstance(names, list) or not all(isinstance(name, str) for name in names)
+            ):
+                raise RpcError(INVALID_PARAMS, f"symbols for {path} must be a list of strings or null")
+            parsed[self._resolve(session, path)] = None if names is None else set(names)
+        return parsed
+
+    def _select(self, session: Session, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Change the selection with mode 'set' (default), 'add' or 'remove'.
+
+        'symbols' maps paths to the symbol names to keep (null selects the
+        whole file again).
+        """
+        root = self._require_project(session)
+        paths = params.get('paths', [])
+        if not isinstance(paths, list):
+            raise RpcError(INVALID_PARAMS, "'paths' must be a list")
+        resolved = {self._resolve(session, path) for path in paths}
+
+        mode = params.get('mode', 'set')
+        if mode == 'set':
+            session.selected = resolved
+        elif mode == 'add':
+            session.selected |= resolved
+        elif mode == 'remove':
+            session.selected -= resolved
+        else:
+            raise RpcError(INVALID_PARAMS, f"unknown select mode: {mode}")
+
+        for path, names in self._parse_symbols(session, params.get('symbols', {})).items():
+            if names is None:
+                session.selected_symbols.pop(path, None)
+            else:
+                session.selected_symbols[path] = names
+
+        # The same fragments export emits, so the counts match
+        with self._fragment_lock:
+            tokens = sum(
+                self.exporter.selected_tokens(root, path, session.selected_symbols.get(path))
+                for path in session.selected
+            )
+        return {
+            'selected': sorted(self.exporter.relative_path(root, path) for path in session.selected),
+            'tokens': tokens,
+        }
+
+    def _export(self, session: Session, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Export the current selection, or the given 'paths' and 'symbols', as a prompt."""
+        root = self._require_project(session)
+        if 'paths' in params:
+            if not isinstance(params['paths'], list):
+                raise RpcError(INVALID_PARAMS, "'paths' must be a list")
+            paths = {self._resolve(session, path) for path in params['paths']}
+            symbols = {
+                path: names for path, names in self._parse_symbols(session, params.get('symbols', {})).items()
+                if names is not None
+            }
+        else:
+            paths = session.selected
+            symbols = session.selected_symbols
+        # The fragment cache is shared and not thread-safe
+        with self._fragment_lock:
+            prompt, tokens = self.exporter.export(root, paths, symbols)
+        return {'prompt': prompt, 'tokens': tokens}
+
+    async def handle_request(self, request: Any, session: Session) -> Optional[Dict[str, Any]]:
+        """Dispatch one JSON-RPC request; notifications get no response."""
+        request_id = request.get('id') if isinstance(request, dict) else None
+        try:
+            if not isinstance(request, dict) or not isinstance(request.get('method'), str):
+                raise RpcError(INVALID_REQUEST, "invalid request")
+            method = self._methods.get(request['method'])
+            if method is None:
+                raise RpcError(METHOD_NOT_FOUND, f"method not found: {request['method']}")
+            params = request.get('params') or {}
+            if not isinstance(params, dict):
+                raise RpcError(INVALID_PARAMS, "params must be an object")
+
+            if self._token is not None and not session.authenticated and request['method'] != 'auth':
+                raise RpcError(UNAUTHORIZED, "not authenticated; call 'auth' first")
+            if 'root' in params and request['method'] not in ('ping', 'auth', 'scan'):
+                self._use_root(session, params['root'])
+
+            if request['method'] in ('ping', 'auth'):
+                result = method(session, params)
+            else:
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(self._executor, method, session, params)
+            response = {'jsonrpc': '2.0', 'id': request_id, 'result': result}
+        except RpcError as e:
+            response = {'jsonrpc': '2.0', 'id': request_id,
+                        'error': {'code': e.code, 'message': e.message}}
+        except Exception as e:
+            logger.exception(f"Error handling request: {request}")
+            response = {'jsonrpc': '2.0', 'id': request_id,
+                        'error': {'code': SERVER_ERROR, 'message': str(e)}}
+
+        if isinstance(request, dict) and 'id' not in request:
+            return None
+        return response
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve one connection: one JSON request per line, one response per line."""
+        logger.debug("Client connected")
+        session = Session()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line)
+                except ValueError as e:
+                    response = {'jsonrpc': '2.0', 'id': None,
+                                'error': {'code': PARSE_ERROR, 'message': str(e)}}
+                else:
+                    response = await self.handle_request(request, session)
+                if response is not None:
+                    writer.write(json.dumps(response).encode('utf-8') + b'\n')
+                    await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            logger.debug("Client disconnected")
+
+    def _write_token_file(self, token_file: str):
+        """Create a fresh token and store it where only the owner can read it."""
+        self._token = secrets.token_hex(32)
+        fd = os.open(token_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            f.write(self._token)
+        os.chmod(token_file, 0o600)
+        self._token_file = token_file
+
+    async def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                    socket_path: Optional[str] = None,
+                    token_file: str = DEFAULT_TOKEN_FILE) -> asyncio.AbstractServer:
+        """Listen on a Unix socket if one is given, else on localhost TCP.
+
+        In TCP mode a new token is written to token_file for clients to read.
+        """
+        # Lines carry whole prompts, so raise the default 64 KiB line limit
+        limit = 64 * 1024 * 1024
+        if socket_path:
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+            # Only the owner may connect; the socket has no other authentication
+            old_umask = os.umask(0o177)
+            try:
+                self._server = await asyncio.start_unix_server(self._handle_client, path=socket_path, limit=limit)
+            finally:
+                os.umask(old_umask)
+            os.chmod(socket_path, 0o600)
+            logger.info(f"Token server listening on {socket_path}")
+        else:
+            self._write_token_file(token_file)
+            self._server = await asyncio.start_server(self._handle_client, host, port, limit=limit)
+            port = self._server.sockets[0].getsockname()[1]
+            logger.info(f"Token server listening on {host}:{port}")
+        return self._server
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self._token_file is not None:
+            try:
+                os.unlink(self._token_file)
+            except OSError:
+                pass
+            self._token_file = None
+        self._executor.shutdown(wait=False)
+
+    async def serve_forever(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                            socket_path: Optional[str] = None,
+                            token_file: str = DEFAULT_TOKEN_FILE):
+        server = await self.start(host, port, socket_path, token_file)
+        try:
+            await server.serve_forever()
+        finally:
+            await self.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Resident token-count server for Repo Prompt")
+    parser.add_argument('--host', default=DEFAULT_HOST, help="TCP host to bind (default: %(default)s)")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help="TCP port to bind (default: %(default)s)")
+    parser.add_argument('--socket', help="Unix socket path; overrides --host/--port")
+    parser.add_argument('--token-file', default=DEFAULT_TOKEN_FILE,
+                        help="Where TCP mode writes its auth token (default: %(default)s)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(TokenServer().serve_forever(args.host, args.port, args.socket, args.token_file))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -43,6 +43,7 @@ class FileTreeView(ttk.Treeview):
         self.tag_configure('checkbox_selected', image='')
         self.tag_configure('checkbox_unselected', image='')
         self.tag_configure('token_count', foreground='#666666')
+        self.tag_configure('symbol', foreground='#444444')
         
         # Add columns
         self["columns"] = ("fullpath", "tokens")
@@ -198,4 +199,11 @@ class FileTreeView(ttk.Treeview):
             token_str, percentage = self.token_counter.get_dir_stats(full_path)
             self.set(item_id, "tokens", f"{token_str} ({percentage:.1f}%)")
             
+        return item_id
+
+    def insert_symbol(self, parent, index, text, symbol, **kwargs):
+        """Insert a PHP/Blade symbol of a file with its token count."""
+        item_id = self.insert(parent, index, text=text, tags=('symbol',), **kwargs)
+        token_str, percentage = self.token_counter.format_stats(symbol.tokens)
+        self.set(item_id, "tokens", f"{token_str} ({percentage:.1f}%)")
         return item_id
\ No newline at end of file
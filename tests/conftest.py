@@ -0,0 +1,38 @@
+import re
+
+import pytest
+import tiktoken
+
+class StubEncoder:
+    """Offline stand-in for the cl100k_base encoder: one token per word,
+    punctuation mark or run of whitespace."""
+
+    def encode(self, text, **kwargs):
+        return re.findall(r"\s+|\w+|[^\w\s]", text)
+
+@pytest.fixture(autouse=True)
+def stub_encoder(monkeypatch):
+    monkeypatch.setattr(tiktoken, "get_encoding", lambda name: StubEncoder())
+
+@pytest.fixture
+def project(tmp_path):
+    root = tmp_path / "project"
+    (root / "app").mkdir(parents=True)
+    (root / "app" / "TaskController.php").write_text(
+        "<?php\n"
+        "class TaskController\n"
+        "{\n"
+        "    public function index()\n"
+        "    {\n"
+        "        return view('tasks.index');\n"
+        "    }\n"
+        "\n"
+        "    public function store()\n"
+        "    {\n"
+        "        return redirect('/tasks');\n"
+        "    }\n"
+        "}\n"
+    )
+    (root / "routes.php").write_text("<?php\nRoute::get('/', fn () => 'home');\n")
+    (tmp_path / "secret.txt").write_text("do not export\n")
+    return root
@@ -0,0 +1,88 @@
+import os
+
+from src.core.prompt_exporter import FragmentCache, PromptExporter
+from src.core.token_counter import TokenCounter
+
+def test_export_reuses_fragments_and_counts_exactly(project):
+    counter = TokenCounter()
+    exporter = PromptExporter(counter)
+    paths = [str(project / 'app' / 'TaskController.php'), str(project / 'routes.php')]
+
+    prompt, tokens = exporter.export(str(project), paths)
+    assert tokens == counter.count_text_tokens(prompt)
+    assert len(exporter.fragment_cache._fragments) == 2
+
+    again, again_tokens = exporter.export(str(project), paths[1:])
+    assert (again, again_tokens) == exporter.export(str(project), paths[1:])
+    assert again_tokens == counter.count_text_tokens(again)
+    assert len(exporter.fragment_cache._fragments) == 2
+
+def test_changed_file_is_rendered_again(project):
+    exporter = PromptExporter(TokenCounter())
+    path = project / 'routes.php'
+    exporter.export(str(project), [str(path)])
+
+    path.write_text("<?php\nRoute::get('/tasks', fn () => 'tasks');\n")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    prompt, _ = exporter.export(str(project), [str(path)])
+    assert "'/tasks'" in prompt
+    assert len(exporter.fragment_cache._fragments) == 1
+
+def test_fragment_cache_evicts_least_recently_used():
+    cache = FragmentCache(max_bytes=300)
+    cache.put(('a',), 'x' * 100, 1)
+    cache.put(('b',), 'y' * 100, 1)
+    cache.get(('a',))
+    cache.put(('c',), 'z' * 100, 1)
+    assert cache.get(('b',)) is None
+    assert cache.get(('a',)) is not None
+    assert cache.size <= 300
+
+def test_warm_export_does_not_reopen_binary_files(project, monkeypatch):
+    exporter = PromptExporter(TokenCounter())
+    binary = project / 'logo.bin'
+    binary.write_bytes(b'\0' * 4096)
+    exporter.export(str(project), [str(binary)])
+
+    def fail(*args, **kwargs):
+        raise AssertionError("binary file read again")
+    monkeypatch.setattr(exporter.fragment_cache, 'read_file', fail)
+    prompt, _ = exporter.export(str(project), [str(binary)])
+    assert 'logo.bin' not in prompt
+
+def test_selected_tokens_match_exported_fragment(project):
+    counter = TokenCounter()
+    exporter = PromptExporter(counter)
+    controller = str(project / 'app' / 'TaskController.php')
+    notes = project / 'NOTES.md'
+    notes.write_text("# Notes\n\nMarkdown is skipped by the counter but still exported.\n")
+
+    cases = [(controller, {'TaskController::store'}), (controller, None), (str(notes), None)]
+    for path, symbols in cases:
+        prompt, _ = exporter.export(str(project), [path], {path: symbols} if symbols else None)
+        fragment = prompt[prompt.index('<file>\n'):prompt.index('</files>')]
+        assert exporter.selected_tokens(str(project), path, symbols) == counter.count_text_tokens(fragment)
+
+def test_deleted_file_state_is_dropped(project):
+    exporter = PromptExporter(TokenCounter())
+    path = project / 'routes.php'
+    exporter.export(str(project), [str(path)])
+    size = exporter.fragment_cache.size
+
+    path.unlink()
+    prompt, _ = exporter.export(str(project), [str(path)])
+    assert 'routes.php' not in prompt
+    assert exporter.fragment_cache._files == {}
+    assert exporter.fragment_cache._fragments == {}
+    assert exporter.fragment_cache.size == 0 < size
+
+def test_file_state_counts_toward_cap(tmp_path):
+    cache = FragmentCache(max_bytes=2000)
+    for i in range(50):
+        path = tmp_path / f'f{i}.php'
+        path.write_text('<?php\n')
+        cache.file_state(str(path))
+    assert len(cache._files) < 50
+    assert cache.size <= 2000
@@ -0,0 +1,62 @@
+from src.core.symbol_parser import parse_symbols, render_skeleton
+
+def test_php_methods_and_functions():
+    content = (
+        "<?php\n"
+        "class A\n"
+        "{\n"
+        "    /**\n"
+        "     * Docs.\n"
+        "     */\n"
+        "    public function a()\n"
+        "    {\n"
+        "        $s = 'function fake() { }';\n"
+        "    }\n"
+        "}\n"
+        "function helper() {\n"
+        "    return new class { function anon() {} };\n"
+        "}\n"
+    )
+    symbols = parse_symbols('a.php', content)
+    assert [(s.qualified_name, s.start, s.end) for s in symbols] == [('A::a', 4, 10), ('helper', 12, 14)]
+
+def test_skeleton_keeps_bodiless_declarations():
+    content = (
+        "<?php\n"
+        "abstract class A\n"
+        "{\n"
+        "    abstract protected function handle(\n"
+        "        string $a\n"
+        "    );\n"
+        "\n"
+        "    public function run()\n"
+        "    {\n"
+        "        return 1;\n"
+        "    }\n"
+        "}\n"
+    )
+    skeleton = render_skeleton(content, parse_symbols('a.php', content), set())
+    assert skeleton == (
+        "<?php\n"
+        "abstract class A\n"
+        "{\n"
+        "    abstract protected function handle(\n"
+        "        string $a\n"
+        "    );\n"
+        "\n"
+        "    public function run()\n"
+        "    {\n"
+        "        // ...\n"
+        "    }\n"
+        "}\n"
+    )
+
+def test_blade_sections_end_at_line_start_only():
+    content = (
+        "@section('title', 'Tasks')\n"
+        "@section('js')\n"
+        "    <script>var s = \"@stop\";</script>\n"
+        "@stop\n"
+    )
+    symbols = parse_symbols('index.blade.php', content)
+    assert [(s.name, s.start, s.end) for s in symbols] == [('title', 1, 1), ('js', 2, 4)]
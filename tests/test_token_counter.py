@@ -0,0 +1,46 @@
+import os
+
+from src.core.token_counter import TokenCounter
+
+def bump_mtime(path):
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+def test_count_is_cached_until_mtime_changes(tmp_path):
+    counter = TokenCounter()
+    path = tmp_path / 'routes.php'
+    path.write_text("<?php\nRoute::get('/');\n")
+    first = counter.count_file_tokens(str(path))
+
+    # Same mtime: the cached count is returned without reading the file
+    stat = path.stat()
+    path.write_text("<?php\nRoute::get('/');\nRoute::get('/tasks');\n")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert counter.count_file_tokens(str(path)) == first
+
+    bump_mtime(path)
+    assert counter.count_file_tokens(str(path)) > first
+
+def test_symbols_are_recounted_after_mtime_change(tmp_path):
+    counter = TokenCounter()
+    path = tmp_path / 'Task.php'
+    path.write_text("<?php\nfunction a() {\n    return 1;\n}\n")
+    assert [s.name for s in counter.get_file_symbols(str(path))] == ['a']
+
+    path.write_text("<?php\nfunction a() {\n    return 1;\n}\nfunction b() {\n    return 2;\n}\n")
+    bump_mtime(path)
+    assert [s.name for s in counter.get_file_symbols(str(path))] == ['a', 'b']
+
+def test_update_total_tokens_drops_deleted_files(tmp_path):
+    counter = TokenCounter()
+    keep = tmp_path / 'keep.php'
+    gone = tmp_path / 'gone.php'
+    keep.write_text("<?php\necho 1;\n")
+    gone.write_text("<?php\necho 2;\n")
+    counter.update_total_tokens(str(tmp_path))
+    assert str(gone) in counter.cache
+
+    gone.unlink()
+    counter.update_total_tokens(str(tmp_path))
+    assert str(gone) not in counter.cache
+    assert counter.total_tokens == counter.cache[str(keep)]
@@ -0,0 +1,246 @@
+import asyncio
+import json
+import os
+import stat
+import tempfile
+import threading
+
+from src.core.token_server import (
+    INVALID_PARAMS, METHOD_NOT_FOUND, UNAUTHORIZED, Session, TokenServer, is_within,
+)
+
+class Connection:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.next_id = 0
+
+    async def call(self, method, **params):
+        self.next_id += 1
+        request = {'jsonrpc': '2.0', 'id': self.next_id, 'method': method, 'params': params}
+        self.writer.write(json.dumps(request).encode('utf-8') + b'\n')
+        await self.writer.drain()
+        response = json.loads(await self.reader.readline())
+        assert response['id'] == self.next_id
+        return response
+
+    def close(self):
+        self.writer.close()
+
+def run_with_server(scenario, setup=None):
+    """Start a server on a free localhost port and run scenario(connect) against it."""
+    async def main(token_file):
+        server = TokenServer()
+        if setup is not None:
+            setup(server)
+        listener = await server.start(port=0, token_file=token_file)
+        port = listener.sockets[0].getsockname()[1]
+
+        async def connect(authenticate=True):
+            connection = Connection(*await asyncio.open_connection('127.0.0.1', port))
+            if authenticate:
+                with open(token_file) as f:
+                    assert (await connection.call('auth', token=f.read()))['result'] is True
+            return connection
+
+        try:
+            await scenario(connect)
+        finally:
+            await server.close()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(main(os.path.join(tmp, 'token')))
+
+def test_scan_select_export(project):
+    async def scenario(connect):
+        client = await connect()
+        scan = (await client.call('scan', root=str(project)))['result']
+        assert set(scan['files']) == {'app/TaskController.php', 'routes.php'}
+        assert scan['total_tokens'] == sum(scan['files'].values())
+
+        symbols = (await client.call('symbols', path='app/TaskController.php'))['result']['symbols']
+        assert [symbol['name'] for symbol in symbols] == ['TaskController::index', 'TaskController::store']
+
+        selection = (await client.call(
+            'select', paths=['app/TaskController.php'],
+            symbols={'app/TaskController.php': ['TaskController::store']},
+        ))['result']
+        assert selection['selected'] == ['app/TaskController.php']
+        assert selection['tokens'] > 0
+
+        export = (await client.call('export'))['result']
+        assert '<file_path>app/TaskController.php</file_path>' in export['prompt']
+        assert "return redirect('/tasks');" in export['prompt']
+        assert "return view('tasks.index');" not in export['prompt']
+        assert 'routes.php' not in export['prompt']
+        assert 0 < selection['tokens'] < export['tokens']
+        client.close()
+
+    run_with_server(scenario)
+
+def test_rejects_paths_outside_project(project):
+    async def scenario(connect):
+        client = await connect()
+        await client.call('scan', root=str(project))
+        for path in [str(project.parent / 'secret.txt'), '../secret.txt']:
+            response = await client.call('export', paths=[path])
+            assert response['error']['code'] == INVALID_PARAMS
+            response = await client.call('count', path=path)
+            assert response['error']['code'] == INVALID_PARAMS
+        client.close()
+
+    run_with_server(scenario)
+
+def test_invalid_requests(project):
+    async def scenario(connect):
+        client = await connect()
+        assert (await client.call('nope'))['error']['code'] == METHOD_NOT_FOUND
+        assert (await client.call('select', paths=['routes.php']))['error']['code'] == INVALID_PARAMS
+
+        await client.call('scan', root=str(project))
+        response = await client.call('select', paths=[], symbols={'routes.php': [['x']]})
+        assert response['error']['code'] == INVALID_PARAMS
+        client.close()
+
+    run_with_server(scenario)
+
+def test_sessions_are_per_connection(project):
+    async def scenario(connect):
+        first = await connect()
+        second = await connect()
+        await first.call('scan', root=str(project))
+        await first.call('select', paths=['routes.php'])
+
+        await second.call('scan', root=str(project))
+        await second.call('select', paths=['app/TaskController.php'])
+
+        export = (await first.call('export'))['result']['prompt']
+        assert '<file_path>routes.php</file_path>' in export
+        assert 'TaskController.php' not in export
+        assert (await second.call('ping'))['result'] == 'pong'
+        first.close()
+        second.close()
+
+    run_with_server(scenario)
+
+def test_new_connection_reuses_scanned_root(project):
+    async def scenario(connect):
+        first = await connect()
+        await first.call('scan', root=str(project))
+
+        second = await connect()
+        response = await second.call('count', root=str(project), path='routes.php')
+        assert response['result']['tokens'] > 0
+
+        other = project.parent / 'other'
+        other.mkdir()
+        response = await second.call('count', root=str(other), path='x.php')
+        assert response['error']['code'] == INVALID_PARAMS
+        first.close()
+        second.close()
+
+    run_with_server(scenario)
+
+def test_rescan_keeps_count_cache(project, monkeypatch):
+    server = TokenServer()
+    session = Session()
+    server._scan(session, {'root': str(project)})
+
+    encoded = []
+    encode = server.token_counter.encoder.encode
+    monkeypatch.setattr(server.token_counter.encoder, 'encode',
+                        lambda text, **kwargs: encoded.append(text) or encode(text))
+    (project / 'app' / 'Old.php').write_text("<?php\n")
+    server._scan(session, {'root': str(project)})
+    assert len(encoded) == 1
+    asyncio.run(server.close())
+
+def test_count_while_another_connection_scans(project):
+    for i in range(300):
+        (project / 'app' / f'Model{i}.php').write_text("<?php\nclass Model {}\n" * 20)
+
+    async def scenario(connect):
+        scanner = await connect()
+        counter = await connect()
+        await counter.call('scan', root=str(project))
+
+        async def count_repeatedly():
+            responses = []
+            for i in range(100):
+                responses.append(await counter.call('count', path=f'app/Model{i % 300}.php'))
+            return responses
+
+        for _ in range(3):
+            scan, counts = await asyncio.gather(
+                scanner.call('scan', root=str(project)), count_repeatedly(),
+            )
+            assert 'result' in scan
+            assert all(response.get('result', {}).get('tokens', 0) > 0 for response in counts)
+        scanner.close()
+        counter.close()
+
+    run_with_server(scenario)
+
+def test_is_within_handles_other_drives(monkeypatch):
+    def commonpath(paths):
+        raise ValueError("Paths don't have the same drive")
+    monkeypatch.setattr(os.path, 'commonpath', commonpath)
+    assert not is_within('C:\\project', 'D:\\x')
+
+def test_tcp_requires_token(project):
+    async def scenario(connect):
+        client = await connect(authenticate=False)
+        assert (await client.call('scan', root=str(project)))['error']['code'] == UNAUTHORIZED
+        assert (await client.call('auth', token='wrong'))['error']['code'] == UNAUTHORIZED
+        assert (await client.call('ping'))['error']['code'] == UNAUTHORIZED
+        client.close()
+
+    run_with_server(scenario)
+
+def test_token_file_is_owner_only(tmp_path):
+    async def main():
+        server = TokenServer()
+        await server.start(port=0, token_file=str(tmp_path / 'token'))
+        mode = stat.S_IMODE(os.stat(tmp_path / 'token').st_mode)
+        await server.close()
+        return mode
+
+    assert asyncio.run(main()) == 0o600
+    assert not (tmp_path / 'token').exists()
+
+def test_scan_does_not_block_other_clients(project):
+    scan_started = threading.Event()
+    release_scan = threading.Event()
+
+    def setup(server):
+        update = server.token_counter.update_total_tokens
+        calls = []
+
+        def slow_update(root):
+            calls.append(root)
+            if len(calls) > 1:
+                scan_started.set()
+                release_scan.wait(10)
+            update(root)
+        server.token_counter.update_total_tokens = slow_update
+
+    async def scenario(connect):
+        scanner = await connect()
+        other = await connect()
+        await other.call('scan', root=str(project))
+
+        scan = asyncio.ensure_future(scanner.call('scan', root=str(project)))
+        await asyncio.get_running_loop().run_in_executor(None, scan_started.wait, 10)
+        try:
+            ping = await asyncio.wait_for(other.call('ping'), 2)
+            count = await asyncio.wait_for(other.call('count', path='routes.php'), 2)
+            assert ping['result'] == 'pong'
+            assert count['result']['tokens'] > 0
+            assert not scan.done()
+        finally:
+            release_scan.set()
+        assert 'result' in await scan
+        scanner.close()
+        other.close()
+
+    run_with_server(scenario, setup)